@@ -1,10 +1,13 @@
 # alembic/env.py
+import asyncio
 import os
 from logging.config import fileConfig
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
 from alembic import context
 from dotenv import load_dotenv
 from sqlmodel import SQLModel
+from api.database import to_async_url  # asyncpg URL conversion shared with the API
 from api.models import Profile, Reading  # Import your models
 
 # Load environment variables
@@ -41,23 +44,30 @@ def run_migrations_offline() -> None:
     with context.begin_transaction():
         context.run_migrations()
 
-def run_migrations_online() -> None:
-    """Run migrations in 'online' mode."""
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
+def do_run_migrations(connection) -> None:
+    """Run migrations on a synchronous connection handed over by the async engine."""
+    context.configure(
+        connection=connection, target_metadata=target_metadata
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online() -> None:
+    """Run migrations in 'online' mode using the asyncpg driver."""
+    async_url, connect_args = to_async_url(DATABASE_URL)
+    connectable = create_async_engine(
+        async_url,
         poolclass=pool.NullPool,
+        connect_args=connect_args,
     )
 
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
 
-        with context.begin_transaction():
-            context.run_migrations()
+    await connectable.dispose()
 
 if context.is_offline_mode():
     run_migrations_offline()
 else:
-    run_migrations_online()
\ No newline at end of file
+    asyncio.run(run_migrations_online())
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""Add reading (profile_id, id DESC) index
+
+Revision ID: 5c1e9a7d2b40
+Revises: 37a304d8069b
+Create Date: 2026-10-14 09:12:05.418233
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '5c1e9a7d2b40'
+down_revision = '37a304d8069b'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Index serving the "latest reading per profile" lookups (DISTINCT ON / ORDER BY id DESC)
+    op.create_index('ix_reading_profile_id_id_desc', 'reading', ['profile_id', sa.text('id DESC')])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Remove the latest-reading index
+    op.drop_index('ix_reading_profile_id_id_desc', table_name='reading')
@@ -0,0 +1,23 @@
+"""Add profile user_id index
+
+Revision ID: 8f3b6d14c2e7
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-14 10:03:47.902516
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '8f3b6d14c2e7'
+down_revision = '5c1e9a7d2b40'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Index for listing a user's profiles (WHERE user_id = ?)
+    op.create_index('ix_profile_user_id', 'profile', ['user_id'])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Remove the user_id index
+    op.drop_index('ix_profile_user_id', table_name='profile')
@@ -4,10 +4,17 @@
 
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from jose import jwk, jwt, JWTError
+from jose.constants import ALGORITHMS
+from jose.exceptions import JWKError
 from httpx import AsyncClient
+from cachetools import TTLCache
 from dotenv import load_dotenv
+import asyncio
+import hashlib
 import os
+import re
+import time
 from pathlib import Path
 
 # Load environment variables from .env.local file
@@ -20,28 +27,131 @@ JWKS_URL = "https://natural-macaw-21.clerk.accounts.dev/.well-known/jwks.json"
 # Initialize HTTPBearer scheme for JWT authentication
 bearer_scheme = HTTPBearer()
 
+# How long fetched JWKS are reused when Clerk sends no Cache-Control max-age
+JWKS_CACHE_TTL = 300
+# Bounds applied to Clerk's max-age so a 0 or huge value neither disables nor pins the cache
+JWKS_MIN_TTL = 60
+JWKS_MAX_TTL = 3600
+# Minimum interval between forced refreshes triggered by an unknown 'kid'
+JWKS_MIN_REFRESH_INTERVAL = 30
+
+# How long a verified token's user_id is reused before the signature is checked again.
+# Logout or revocation on Clerk's side can take up to this long to be picked up here.
+TOKEN_CACHE_TTL = 60
+
+# Shared HTTP client so the connection pool to Clerk stays warm between fetches.
+# Created lazily so a new app lifespan after close_http_client() gets a fresh client.
+_http_client: AsyncClient | None = None
+
+# In-memory JWKS cache (raw key set plus prebuilt RS256 public keys by 'kid') and the lock serializing refreshes
+_jwks_cache = {"keys": None, "pubkeys": {}, "exp": 0.0, "fetched": 0.0}
+_jwks_lock = asyncio.Lock()
+
+# Verified tokens (keyed by a digest of the raw token) mapped to (user_id, expires_at).
+# Only touched from the event loop with no awaits in between, so no lock is needed.
+_token_cache = TTLCache(maxsize=4096, ttl=TOKEN_CACHE_TTL)
+
+# Function to derive a fixed-size cache key from a raw bearer token
+def _token_key(token: str) -> bytes:
+    """Hash the token so cache memory does not grow with token length."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+# Function to get (or create) the shared HTTP client
+def _get_http_client() -> AsyncClient:
+    """Return the shared HTTP client, creating it on first use or after it was closed."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = AsyncClient(timeout=10.0)
+    return _http_client
+
+# Function to close the shared HTTP client on application shutdown
+async def close_http_client():
+    """Close the pooled connections used for JWKS fetches."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# Function to read the max-age directive from a Cache-Control header
+def _max_age(cache_control: str) -> int | None:
+    """Return the max-age value of a Cache-Control header, if present."""
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(match.group(1)) if match else None
+
+# Function to turn a JWKS into ready-to-use public key objects
+def _build_public_keys(jwks) -> dict:
+    """Construct RS256 public keys once per JWKS refresh, keyed by 'kid'."""
+    pubkeys = {}
+    for k in jwks.get("keys", []):
+        if k.get("alg") != ALGORITHMS.RS256:
+            continue
+        try:
+            pubkeys[k.get("kid")] = jwk.construct(k, ALGORITHMS.RS256)
+        except JWKError:
+            continue  # Skip malformed keys rather than failing every request
+    return pubkeys
+
 # Function to fetch JWKS (JSON Web Key Set) from Clerk
-async def get_jwks():
-    """Fetch JWKS from Clerk's endpoint to get public keys for JWT verification."""
-    async with AsyncClient() as client:
+async def get_jwks(force_refresh: bool = False):
+    """Return Clerk's JWKS, fetching it only when the cached copy has expired."""
+    if not force_refresh and _jwks_cache["keys"] is not None and time.monotonic() < _jwks_cache["exp"]:
+        return _jwks_cache["keys"]
+    async with _jwks_lock:
+        now = time.monotonic()
+        # Another request may have refreshed the cache while we waited for the lock
+        if _jwks_cache["keys"] is not None:
+            if not force_refresh and now < _jwks_cache["exp"]:
+                return _jwks_cache["keys"]
+            if force_refresh and now - _jwks_cache["fetched"] < JWKS_MIN_REFRESH_INTERVAL:
+                return _jwks_cache["keys"]
         try:
-            response = await client.get(JWKS_URL)
+            response = await _get_http_client().get(JWKS_URL)
             response.raise_for_status()  # Raise an error for bad HTTP status
-            return response.json()
+            jwks = response.json()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch JWKS: {str(e)}")
+        ttl = _max_age(response.headers.get("cache-control"))
+        _jwks_cache["keys"] = jwks
+        _jwks_cache["pubkeys"] = _build_public_keys(jwks)
+        _jwks_cache["fetched"] = now
+        ttl = min(max(ttl, JWKS_MIN_TTL), JWKS_MAX_TTL) if ttl is not None else JWKS_CACHE_TTL
+        _jwks_cache["exp"] = now + ttl
+        return jwks
+
+# Function to find the signing key matching a token's 'kid' header
+async def get_signing_key(kid: str | None):
+    """Look up the prebuilt RS256 public key for the given 'kid', refreshing JWKS once on a miss."""
+    for force_refresh in (False, True):
+        await get_jwks(force_refresh=force_refresh)
+        pubkeys = _jwks_cache["pubkeys"]
+        key = pubkeys.get(kid) if kid is not None else next(iter(pubkeys.values()), None)
+        if key:
+            return key
+    return None
 
 # Function to verify Clerk JWT token and extract user ID
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> str:
     """Verify Clerk JWT token and return user_id."""
     token = credentials.credentials  # Extract the token from the Authorization header
+    cache_key = _token_key(token)
+    cached = _token_cache.get(cache_key)
+    if cached:
+        user_id, expires_at = cached
+        if time.time() < expires_at:
+            return user_id
+        _token_cache.pop(cache_key, None)  # Token expired since it was cached
     try:
-        # Fetch JWKS to get the public key
-        jwks = await get_jwks()
-        # Find the appropriate key for RS256 algorithm
-        key = next((k for k in jwks["keys"] if k["alg"] == "RS256"), None)
+        # Find the public key that signed the token using its 'kid' header
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is not None and not isinstance(kid, str):
+            raise JWTError("Invalid token header: 'kid' must be a string")
+        key = await get_signing_key(kid)
         if not key:
-            raise HTTPException(status_code=401, detail="No valid RS256 key found in JWKS")
+            raise HTTPException(
+                status_code=401,
+                detail="No valid RS256 key found in JWKS",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         
         # Decode and verify the JWT with audience and issuer validation
         payload = jwt.decode(
@@ -53,9 +163,19 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(beare
         )
         user_id = payload.get("sub")  # Extract user ID from the 'sub' claim
         if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token: Missing sub claim")
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid token: Missing sub claim",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        # Remember the result until the token expires or the cache TTL passes, whichever is first
+        now = time.time()
+        expires_at = min(payload.get("exp", now + TOKEN_CACHE_TTL), now + TOKEN_CACHE_TTL)
+        if expires_at > now:
+            _token_cache[cache_key] = (user_id, expires_at)
         return user_id
     except JWTError as e:
+        _token_cache.pop(cache_key, None)
         raise HTTPException(
             status_code=401,
             detail=f"Could not validate credentials: {str(e)}",
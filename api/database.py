@@ -1,15 +1,18 @@
 # api/database.py
 # Description: This file manages database connections and initialization for the FastAPI application.
-# It uses SQLAlchemy and SQLModel to interact with a PostgreSQL database hosted on NeonDB.
+# It uses SQLAlchemy's asyncio extension (asyncpg driver) and SQLModel to interact with a
+# PostgreSQL database hosted on NeonDB.
 
 import os
 import logging
-from sqlalchemy import create_engine, text
-from sqlmodel import SQLModel, Session
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from dotenv import load_dotenv
 
-# Configure logging for debugging and monitoring
-logging.basicConfig(level=logging.INFO)
+# Configure logging for debugging and monitoring (set LOG_LEVEL=INFO or DEBUG for more detail)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env.local file
@@ -19,7 +22,7 @@ load_dotenv(env_path)
 
 # Get the database URL from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")
-logger.info(f"DATABASE_URL loaded: {DATABASE_URL}")
+logger.debug(f"DATABASE_URL loaded: {DATABASE_URL}")
 
 # Validate that DATABASE_URL is set
 if not DATABASE_URL:
@@ -29,24 +32,56 @@ if not DATABASE_URL:
 db_name = DATABASE_URL.split("/")[-1].split("?")[0]
 logger.info(f"Database name: {db_name}")
 
-# Create SQLAlchemy engine for database connection
-engine = create_engine(DATABASE_URL, echo=True)  # Echo=True for SQL query logging
+# Function to convert a libpq-style URL into an asyncpg URL and its connect arguments
+def to_async_url(url: str):
+    """Return (async_url, connect_args) for the asyncpg driver.
+
+    asyncpg rejects libpq-only query parameters such as sslmode and channel_binding,
+    so they are stripped from the URL and sslmode is passed through as asyncpg's ssl option.
+    """
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    connect_args = {"ssl": sslmode} if sslmode else {}
+    return parsed.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+ASYNC_DATABASE_URL, CONNECT_ARGS = to_async_url(DATABASE_URL)
+# Tag connections so they can be identified in NeonDB's pg_stat_activity
+CONNECT_ARGS["server_settings"] = {"application_name": os.getenv("DB_APPLICATION_NAME", "bill-mgmt")}
+
+# Connection pool settings, overridable per deployment
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))  # Connections kept open
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))  # Extra connections allowed under burst load
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))  # Seconds before a connection is replaced
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING") == "1"  # Ping connections on checkout (off by default)
+
+# Create SQLAlchemy async engine for database connection
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=os.getenv("SQL_ECHO") == "1",  # Set SQL_ECHO=1 to log every SQL statement
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_recycle=POOL_RECYCLE,  # Recycle before NeonDB drops idle connections
+    pool_pre_ping=POOL_PRE_PING,
+    connect_args=CONNECT_ARGS,
+)
 
 # Dependency to provide a database session for FastAPI endpoints
-def get_db():
-    db = Session(engine)  # Create a new session
-    try:
-        yield db  # Yield the session for use in endpoints
-    finally:
-        db.close()  # Ensure the session is closed after use
-
-# Function to initialize the database (currently uses Alembic for schema management)
-def init_db():
+async def get_db():
+    async with AsyncSession(engine, expire_on_commit=False) as db:  # Create a new session
+        yield db  # Yield the session for use in endpoints; closed when the request ends
+
+# Function to initialize the database (schema is managed by Alembic migrations)
+async def init_db():
     # Log that automatic schema creation is skipped in favor of Alembic migrations
     logger.info("Skipping automatic schema creation; manage schema with Alembic migrations")
-    # Check for existing tables in the database
-    with Session(engine) as session:
-        tables = session.exec(
+    # The table probe is informational only and costs a NeonDB round trip (and a possible
+    # compute wake-up) on every cold start, so it only runs with BOOT_PROBE=1
+    if os.getenv("BOOT_PROBE") != "1":
+        return
+    async with AsyncSession(engine) as session:
+        tables = (await session.exec(
             text("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public' AND table_name IN ('profile', 'reading')")
-        ).all()
+        )).all()
         logger.info(f"Existing tables: {tables}")
\ No newline at end of file
@@ -1,90 +1,74 @@
 # api/main.py
 # Description: This file sets up a FastAPI application for managing user profiles and meter readings.
 # It handles authentication, database interactions, and provides RESTful API endpoints.
+# Endpoints are async and await every AsyncSession call; do not add synchronous DB or
+# network calls inside them, as that would block the event loop for all requests.
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sqlmodel import Session, select, SQLModel
+from fastapi.responses import ORJSONResponse
+from sqlmodel import select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
-from auth import get_current_user  # Custom dependency for user authentication
-from database import get_db, init_db  # Database session and initialization
+from auth import close_http_client, get_current_user  # User authentication dependency and HTTP client cleanup
+from middleware import RequestTimingMiddleware  # Pure ASGI request timing
+from database import engine, get_db, init_db  # Database engine, session and initialization
 from models import Profile, Reading  # SQLModel database models
+from schemas import (  # Pydantic request/response models with validation
+    InitialReadingUpdate,
+    ProfileCreate,
+    ProfileResponse,
+    ReadingCreate,
+    ReadingPage,
+    ReadingResponse,
+)
+import asyncio
 import logging
-from datetime import datetime
+import os
+from sqlalchemy import delete
 from sqlalchemy.sql import text
 from contextlib import asynccontextmanager
 
-# Configure logging for debugging and monitoring
-logging.basicConfig(level=logging.INFO)
+# Configure logging for debugging and monitoring (set LOG_LEVEL=INFO or DEBUG for more detail)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI application
-app = FastAPI()
-
-# Enable CORS to allow frontend requests from any origin
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for development
-    allow_credentials=True,
-    allow_methods=["*"],  # Allow all HTTP methods
-    allow_headers=["*"],  # Allow all headers
-)
-
 # Lifespan event to manage startup and shutdown tasks
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize database and log available tables
-    init_db()  # Create database tables if they don't exist
-    with Session(get_db()) as session:
-        tables = session.exec(
-            text("SELECT table_schema, table_name FROM information_schema.tables WHERE table_name IN ('profile', 'reading')")
-        ).all()
-        logger.info(f"Tables found: {tables}")
+    # Startup: Initialize database (schema itself is managed by Alembic)
+    await init_db()
     yield
-    # Shutdown: Log application shutdown
+    # Shutdown: Release pooled connections and log application shutdown
+    await close_http_client()
+    await engine.dispose()
     logger.info("Application shutdown")
 
-# Assign lifespan event to the app
-app.lifespan = lifespan
-
-# Pydantic models for request and response validation
-class ProfileCreate(BaseModel):
-    tenant_name: str  # Name of the tenant
-    meter_number: str  # Meter number for the profile
-
-class ProfileResponse(BaseModel):
-    id: int  # Profile ID
-    user_id: str  # Clerk user ID
-    tenant_name: str  # Name of the tenant
-    meter_number: str  # Meter number
-    last_consumption: Optional[int] = None  # Last recorded consumption
-    last_reading_date: Optional[str] = None  # Date of the last reading
-    initial_reading: Optional[int] = None  # Initial meter reading
+# Initialize FastAPI application with its lifespan handler; orjson writes the response bytes
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-class ReadingCreate(BaseModel):
-    profile_id: int  # Associated profile ID
-    date: str  # Date in "YYYY-MM-DD" format
-    previous: int  # Previous meter reading
-    current: int  # Current meter reading
+# Frontend origins allowed to call the API (comma-separated CORS_ORIGINS overrides the default)
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",") if o.strip()]
 
-class ReadingResponse(BaseModel):
-    id: int  # Reading ID
-    profile_id: int  # Associated profile ID
-    date: str  # Date of the reading
-    previous: int  # Previous meter reading
-    current: int  # Current meter reading
-    consumption: int  # Calculated consumption
+# Enable CORS to allow requests from the frontend
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=CORS_ORIGINS,  # Only the known frontend origins
+    allow_credentials=True,
+    allow_methods=["*"],  # Allow all HTTP methods
+    allow_headers=["*"],  # Allow all headers
+    max_age=7200,  # Let browsers cache preflight responses for 2 hours
+)
 
-class InitialReadingUpdate(BaseModel):
-    initial_reading: int  # Initial meter reading to update
+# Report per-request processing time in the X-Response-Time header
+app.add_middleware(RequestTimingMiddleware)
 
 # Endpoint to create a new profile for the authenticated user
 @app.post("/api/profiles", response_model=ProfileResponse)
 async def create_profile(
     profile: ProfileCreate,
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
+    db: AsyncSession = Depends(get_db)  # Database session dependency
 ):
     try:
         # Create a new profile with the provided data
@@ -95,19 +79,11 @@ async def create_profile(
             initial_reading=None,
         )
         db.add(db_profile)  # Add profile to the database
-        db.commit()  # Commit the transaction
-        db.refresh(db_profile)  # Refresh the profile object
+        await db.commit()  # Commit the transaction
+        await db.refresh(db_profile)  # Refresh the profile object
         logger.info(f"Created profile: {db_profile.id}")
-        # Return the created profile in response format
-        return ProfileResponse(
-            id=db_profile.id,
-            user_id=db_profile.user_id,
-            tenant_name=db_profile.tenant_name,
-            meter_number=db_profile.meter_number,
-            last_consumption=None,
-            last_reading_date=None,
-            initial_reading=None,
-        )
+        # Return the created profile in response format (a new profile has no readings yet)
+        return ProfileResponse.model_validate(db_profile)
     except Exception as e:
         logger.error(f"Error creating profile: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -116,25 +92,29 @@ async def create_profile(
 @app.get("/api/profiles", response_model=List[ProfileResponse])
 async def get_profiles(
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
+    db: AsyncSession = Depends(get_db)  # Database session dependency
 ):
     try:
-        # Fetch all profiles associated with the user
-        profiles = db.exec(select(Profile).where(Profile.user_id == user_id)).all()
+        # Latest reading per profile in one statement (PostgreSQL DISTINCT ON)
+        latest = (
+            select(Reading.profile_id, Reading.id, Reading.consumption, Reading.date)
+            .distinct(Reading.profile_id)
+            .where(Reading.profile_id.in_(select(Profile.id).where(Profile.user_id == user_id)))
+            .order_by(Reading.profile_id, Reading.id.desc())
+            .subquery()
+        )
+        # Fetch all profiles associated with the user joined with their latest reading
+        rows = (await db.exec(
+            select(Profile, latest.c.id, latest.c.consumption, latest.c.date)
+            .join(latest, latest.c.profile_id == Profile.id, isouter=True)
+            .where(Profile.user_id == user_id)
+            .order_by(Profile.id)
+        )).all()
         profile_responses = []
-        for p in profiles:
-            # Fetch the latest reading for the profile
-            latest_reading = db.exec(
-                select(Reading)
-                .where(Reading.profile_id == p.id)
-                .order_by(Reading.id.desc())
-                .limit(1)
-            ).first()
-            last_consumption = latest_reading.consumption if latest_reading else None
-            last_reading_date = latest_reading.date.isoformat() if latest_reading else None
-            logger.info(
-                f"Profile {p.id}: Latest reading id={latest_reading.id if latest_reading else 'None'}, "
-                f"consumption={last_consumption}, date={last_reading_date}"
+        for p, reading_id, last_consumption, last_reading_date in rows:
+            logger.debug(
+                "Profile %s: Latest reading id=%s, consumption=%s, date=%s",
+                p.id, reading_id, last_consumption, last_reading_date,
             )
             # Add profile details to the response list
             profile_responses.append(
@@ -148,7 +128,8 @@ async def get_profiles(
                     initial_reading=p.initial_reading,
                 )
             )
-        logger.info(f"Fetched profiles for user {user_id}: {[p.id for p in profiles]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetched profiles for user %s: %s", user_id, [r.id for r in profile_responses])
         return profile_responses
     except Exception as e:
         logger.error(f"Error fetching profiles: {str(e)}")
@@ -159,25 +140,38 @@ async def get_profiles(
 async def get_profile(
     profile_id: int,  # Profile ID from URL path
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
 ):
     try:
-        # Fetch the profile and verify user ownership
-        profile = db.get(Profile, profile_id)
-        if not profile or profile.user_id != user_id:
+        # Fetch the profile and its latest reading concurrently; a session cannot run two
+        # queries at once, so each query gets its own session (and pooled connection)
+        async with AsyncSession(engine) as profile_db, AsyncSession(engine) as reading_db:
+            # return_exceptions=True waits for both queries to finish even if one fails, so
+            # neither session is closed while its query is still running
+            profile_result, latest_result = await asyncio.gather(
+                # Ownership is part of the WHERE clause, so foreign profiles never come back
+                profile_db.exec(
+                    select(Profile).where(Profile.id == profile_id, Profile.user_id == user_id)
+                ),
+                reading_db.exec(
+                    # Only the two columns the response needs; avoids building a Reading instance
+                    select(Reading.consumption, Reading.date)
+                    .where(Reading.profile_id == profile_id)
+                    .order_by(Reading.id.desc())
+                    .limit(1)
+                ),
+                return_exceptions=True,
+            )
+            for result in (profile_result, latest_result):
+                if isinstance(result, BaseException):
+                    raise result
+            profile = profile_result.first()
+            latest_reading = latest_result.first()
+        if not profile:
             raise HTTPException(status_code=404, detail="Profile not found or not authorized")
-        # Fetch the latest reading for the profile
-        latest_reading = db.exec(
-            select(Reading)
-            .where(Reading.profile_id == profile.id)
-            .order_by(Reading.id.desc())
-            .limit(1)
-        ).first()
-        last_consumption = latest_reading.consumption if latest_reading else None
-        last_reading_date = latest_reading.date.isoformat() if latest_reading else None
-        logger.info(
-            f"Profile {profile_id}: Latest reading id={latest_reading.id if latest_reading else 'None'}, "
-            f"consumption={last_consumption}, date={last_reading_date}"
+        last_consumption, last_reading_date = latest_reading if latest_reading else (None, None)
+        logger.debug(
+            "Profile %s: Latest reading consumption=%s, date=%s",
+            profile_id, last_consumption, last_reading_date,
         )
         # Return the profile details
         return ProfileResponse(
@@ -202,40 +196,45 @@ async def update_initial_reading(
     profile_id: int,  # Profile ID from URL path
     update: InitialReadingUpdate,  # Request body with initial reading
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
+    db: AsyncSession = Depends(get_db)  # Database session dependency
 ):
     try:
-        # Fetch the profile and verify user ownership
-        profile = db.get(Profile, profile_id)
-        if not profile or profile.user_id != user_id:
+        # Update the initial reading (scoped to the owner) and fetch the latest reading in one statement
+        query = text(
+            """
+            WITH upd AS (
+                UPDATE profile SET initial_reading = :initial_reading
+                WHERE id = :profile_id AND user_id = :user_id
+                RETURNING id, user_id, tenant_name, meter_number, initial_reading
+            )
+            SELECT upd.*, r.consumption AS last_consumption, r.date AS last_reading_date
+            FROM upd
+            LEFT JOIN LATERAL (
+                SELECT consumption, date FROM reading
+                WHERE profile_id = upd.id
+                ORDER BY id DESC
+                LIMIT 1
+            ) r ON TRUE
+            """
+        )
+        row = (await db.exec(
+            query,
+            params={"initial_reading": update.initial_reading, "profile_id": profile_id, "user_id": user_id},
+        )).mappings().first()
+        if not row:
             raise HTTPException(status_code=404, detail="Profile not found or not authorized")
-        
-        # Update the initial reading
-        profile.initial_reading = update.initial_reading
-        db.add(profile)
-        db.commit()
-        db.refresh(profile)
-        
-        # Fetch the latest reading for the updated profile
-        latest_reading = db.exec(
-            select(Reading)
-            .where(Reading.profile_id == profile.id)
-            .order_by(Reading.id.desc())
-            .limit(1)
-        ).first()
-        last_consumption = latest_reading.consumption if latest_reading else None
-        last_reading_date = latest_reading.date.isoformat() if latest_reading else None
+        await db.commit()
         
         logger.info(f"Updated initial reading for profile {profile_id}: {update.initial_reading}")
         # Return the updated profile details
         return ProfileResponse(
-            id=profile.id,
-            user_id=profile.user_id,
-            tenant_name=profile.tenant_name,
-            meter_number=profile.meter_number,
-            last_consumption=last_consumption,
-            last_reading_date=last_reading_date,
-            initial_reading=profile.initial_reading,
+            id=row["id"],
+            user_id=row["user_id"],
+            tenant_name=row["tenant_name"],
+            meter_number=row["meter_number"],
+            last_consumption=row["last_consumption"],
+            last_reading_date=row["last_reading_date"],
+            initial_reading=row["initial_reading"],
         )
     except HTTPException as e:
         logger.error(f"HTTP error in update_initial_reading: {str(e)}")
@@ -249,20 +248,18 @@ async def update_initial_reading(
 async def delete_profile(
     profile_id: int,  # Profile ID from URL path
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
+    db: AsyncSession = Depends(get_db)  # Database session dependency
 ):
     try:
-        # Fetch the profile and verify user ownership
-        profile = db.get(Profile, profile_id)
-        if not profile:
-            raise HTTPException(status_code=404, detail="Profile not found")
-        
-        if profile.user_id != user_id:
-            raise HTTPException(status_code=403, detail="Not authorized to delete this profile")
-        
-        # Delete the profile from the database
-        db.delete(profile)
-        db.commit()
+        # Delete the profile only if the user owns it (readings cascade in the database)
+        deleted = (await db.exec(
+            delete(Profile)
+            .where(Profile.id == profile_id, Profile.user_id == user_id)
+            .returning(Profile.id)
+        )).first()
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Profile not found or not authorized")
+        await db.commit()
         logger.info(f"Deleted profile {profile_id}")
         
         # Return success message
@@ -279,46 +276,32 @@ async def delete_profile(
 async def create_reading(
     reading: ReadingCreate,  # Request body with reading data
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
+    db: AsyncSession = Depends(get_db)  # Database session dependency
 ):
     try:
-        logger.info(f"Received reading request: {reading.dict()}")
-        # Verify the profile and user ownership
-        profile = db.get(Profile, reading.profile_id)
-        logger.info(f"Profile lookup for ID {reading.profile_id}: {'Found' if profile else 'Not found'}")
-        if not profile or profile.user_id != user_id:
+        logger.debug(f"Received reading request: {reading.model_dump()}")
+        # Verify the profile and user ownership in a single lookup
+        owned = (await db.exec(
+            select(Profile.id).where(Profile.id == reading.profile_id, Profile.user_id == user_id)
+        )).first()
+        logger.debug(f"Profile lookup for ID {reading.profile_id}: {'Found' if owned else 'Not found'}")
+        if not owned:
             raise HTTPException(status_code=404, detail=f"Profile {reading.profile_id} not found or not owned by user {user_id}")
         
-        # Parse the date and validate format
-        try:
-            parsed_date = datetime.fromisoformat(reading.date.replace('Z', '+00:00'))
-        except ValueError:
-            logger.error(f"Invalid date format: {reading.date}")
-            raise HTTPException(status_code=422, detail="Invalid date format, expected YYYY-MM-DD")
-        
         # Create a new reading with calculated consumption
         db_reading = Reading(
             profile_id=reading.profile_id,
-            date=parsed_date,
+            date=reading.date,
             previous=reading.previous,
             current=reading.current,
             consumption=reading.current - reading.previous
         )
         db.add(db_reading)
-        db.commit()
-        db.refresh(db_reading)
+        await db.commit()
+        await db.refresh(db_reading)
         logger.info(f"Created reading ID {db_reading.id} for profile {reading.profile_id}")
-        inserted_reading = db.get(Reading, db_reading.id)
-        logger.info(f"Verified reading ID {db_reading.id}: {'Found' if inserted_reading else 'Not found'}")
         # Return the created reading
-        return ReadingResponse(
-            id=db_reading.id,
-            profile_id=db_reading.profile_id,
-            date=db_reading.date.isoformat(),
-            previous=db_reading.previous,
-            current=db_reading.current,
-            consumption=db_reading.consumption
-        )
+        return ReadingResponse.model_validate(db_reading)
     except HTTPException as e:
         logger.error(f"HTTP error in create_reading: {str(e)}")
         raise
@@ -326,34 +309,36 @@ async def create_reading(
         logger.error(f"Error creating reading: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Endpoint to fetch all readings for a profile
-@app.get("/api/readings", response_model=List[ReadingResponse])
+# Endpoint to fetch a page of readings for a profile, newest first
+@app.get("/api/readings", response_model=ReadingPage)
 async def get_readings(
     profile_id: int,  # Profile ID from query parameter
+    limit: int = Query(100, ge=1, le=500),  # Maximum readings per page
+    before_id: Optional[int] = None,  # Cursor: only return readings with a smaller id
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
+    db: AsyncSession = Depends(get_db)  # Database session dependency
 ):
     try:
-        # Verify the profile and user ownership
-        profile = db.get(Profile, profile_id)
-        if not profile or profile.user_id != user_id:
+        # Verify the profile and user ownership in a single lookup
+        owned = (await db.exec(
+            select(Profile.id).where(Profile.id == profile_id, Profile.user_id == user_id)
+        )).first()
+        if not owned:
             raise HTTPException(status_code=404, detail="Profile not found")
         
-        # Fetch all readings for the profile
-        readings = db.exec(select(Reading).where(Reading.profile_id == profile_id)).all()
-        logger.info(f"Fetched {len(readings)} readings for profile {profile_id}")
-        # Return the readings in response format
-        return [
-            ReadingResponse(
-                id=r.id,
-                profile_id=r.profile_id,
-                date=r.date.isoformat(),
-                previous=r.previous,
-                current=r.current,
-                consumption=r.consumption
-            )
-            for r in readings
-        ]
+        # Fetch one page of readings via the (profile_id, id DESC) index
+        query = select(Reading).where(Reading.profile_id == profile_id)
+        if before_id is not None:
+            query = query.where(Reading.id < before_id)
+        readings = (await db.exec(query.order_by(Reading.id.desc()).limit(limit))).all()
+        logger.debug(f"Fetched {len(readings)} readings for profile {profile_id}")
+        # A full page means there may be more; the last id becomes the next cursor
+        next_cursor = readings[-1].id if len(readings) == limit else None
+        # Return the ORM rows; FastAPI validates them against ReadingPage
+        return {"items": readings, "next_cursor": next_cursor}
+    except HTTPException as e:
+        logger.error(f"HTTP error in get_readings: {str(e)}")
+        raise
     except Exception as e:
         logger.error(f"Error fetching readings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -363,51 +348,71 @@ async def get_readings(
 async def delete_reading(
     reading_id: int,  # Reading ID from URL path
     user_id: str = Depends(get_current_user),  # Get authenticated user ID
-    db: Session = Depends(get_db)  # Database session dependency
+    db: AsyncSession = Depends(get_db)  # Database session dependency
 ):
     try:
-        # Fetch the reading and verify user ownership
-        reading = db.get(Reading, reading_id)
-        if not reading:
-            raise HTTPException(status_code=404, detail="Reading not found")
-        
-        profile = db.get(Profile, reading.profile_id)
-        if not profile or profile.user_id != user_id:
-            raise HTTPException(status_code=403, detail="Not authorized to delete this reading")
-        
-        # Delete the reading from the database
-        db.delete(reading)
-        db.commit()
+        # Delete the reading only if it belongs to one of the user's profiles
+        deleted = (await db.exec(
+            delete(Reading)
+            .where(
+                Reading.id == reading_id,
+                Reading.profile_id.in_(select(Profile.id).where(Profile.user_id == user_id)),
+            )
+            .returning(Reading.id)
+        )).first()
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Reading not found or not authorized")
+        await db.commit()
         logger.info(f"Deleted reading {reading_id}")
         
         # Return success message
         return {"status": "success", "message": f"Reading {reading_id} deleted"}
+    except HTTPException as e:
+        logger.error(f"HTTP error in delete_reading: {str(e)}")
+        raise
     except Exception as e:
         logger.error(f"Error deleting reading: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Test endpoint to verify database connection
-@app.get("/api/test-db")
-async def test_db(db: Session = Depends(get_db)):
+# Test endpoint to verify database connection (registered only with ENABLE_DEBUG_ROUTES=1)
+async def test_db(db: AsyncSession = Depends(get_db)):
     try:
         # Fetch one profile to test database connectivity
-        result = db.exec(select(Profile).limit(1)).all()
+        result = (await db.exec(select(Profile).limit(1))).all()
         logger.info(f"Test DB: {len(result)} profiles found")
         return {"status": "connected", "data": [r.dict() for r in result]}
     except Exception as e:
         logger.error(f"Error testing database: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Test endpoint to fetch database schema information
-@app.get("/api/schema")
-async def get_schema(db: Session = Depends(get_db)):
+# Test endpoint to fetch database schema information (registered only with ENABLE_DEBUG_ROUTES=1)
+async def get_schema(db: AsyncSession = Depends(get_db)):
     try:
         # Query to fetch schema information for profile and reading tables
         query = text("SELECT table_schema, table_name FROM information_schema.tables WHERE table_name IN ('profile', 'reading')")
-        result = db.exec(query).all()
+        result = (await db.exec(query)).all()
         logger.info(f"Schema tables: {result}")
         # Return schema information in a structured format
         return {"tables": [{"schema": row[0], "name": row[1]} for row in result]}
     except Exception as e:
         logger.error(f"Error fetching schema: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Debug routes are unauthenticated and hit the database, so they are not exposed by default
+if os.getenv("ENABLE_DEBUG_ROUTES") == "1":
+    app.add_api_route("/api/test-db", test_db, methods=["GET"])
+    app.add_api_route("/api/schema", get_schema, methods=["GET"])
+
+# Run the API directly with `python main.py`; uses uvloop and httptools when installed
+if __name__ == "__main__":
+    import importlib.util
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",  # uvloop has no Windows build
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
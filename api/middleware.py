@@ -0,0 +1,31 @@
+# api/middleware.py
+# Description: This file defines ASGI middleware for the FastAPI application.
+# Middleware here is written in pure ASGI form (no BaseHTTPMiddleware) so it adds no
+# per-request Request/Response object construction to the hot path.
+
+import time
+
+# Middleware that reports how long the app took to start responding
+class RequestTimingMiddleware:
+    """Add an X-Response-Time header (milliseconds) to every HTTP response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Pass lifespan and websocket traffic straight through
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"x-response-time", f"{elapsed_ms:.2f}ms".encode()))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
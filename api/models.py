@@ -3,6 +3,7 @@
 # These models represent the structure of the 'profile' and 'reading' tables in the PostgreSQL database.
 
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, text
 from typing import Optional
 from datetime import datetime
 
@@ -11,7 +12,7 @@ class Profile(SQLModel, table=True):
     __tablename__ = "profile"  # Name of the database table
     
     id: int = Field(primary_key=True)  # Unique identifier for each profile
-    user_id: str  # Clerk user ID associated with the profile
+    user_id: str = Field(index=True)  # Clerk user ID associated with the profile (indexed)
     tenant_name: str  # Name of the tenant
     meter_number: str  # Meter number for the profile
     initial_reading: Optional[int] = Field(default=None)  # Initial meter reading (nullable)
@@ -19,6 +20,10 @@ class Profile(SQLModel, table=True):
 # Model for the 'reading' table
 class Reading(SQLModel, table=True):
     __tablename__ = "reading"  # Name of the database table
+    __table_args__ = (
+        # Serves "latest reading for a profile" lookups (ORDER BY id DESC)
+        Index("ix_reading_profile_id_id_desc", "profile_id", text("id DESC")),
+    )
     
     id: int = Field(primary_key=True)  # Unique identifier for each reading
     profile_id: int = Field(foreign_key="profile.id", ondelete="CASCADE")  # Foreign key to Profile
@@ -1,18 +1,19 @@
 # api/schemas.py
 # Description: This file defines Pydantic models for request and response validation.
-# It includes validation logic for profile and reading data.
+# It includes validation logic for profile and reading data. Validators run before the
+# endpoint body, so invalid requests are rejected without touching the database.
 
-from pydantic import BaseModel, validator
-from datetime import datetime
-from uuid import UUID
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, ValidationInfo, field_validator
+from datetime import datetime, timezone
+from typing import List, Optional
 
 # Schema for creating a new profile
 class ProfileCreate(BaseModel):
     tenant_name: str  # Name of the tenant
     meter_number: str  # Meter number for the profile
 
-    @validator("tenant_name", "meter_number")
+    @field_validator("tenant_name", "meter_number")
+    @classmethod
     def check_non_empty(cls, v: str) -> str:
         """Validate that the field is not empty or whitespace."""
         if not v.strip():
@@ -21,43 +22,63 @@ class ProfileCreate(BaseModel):
 
 # Schema for profile response
 class ProfileResponse(BaseModel):
-    id: UUID  # Unique identifier for the profile
+    model_config = ConfigDict(from_attributes=True)  # Allow validation straight from ORM objects
+
+    id: int  # Profile ID
     user_id: str  # Clerk user ID
     tenant_name: str  # Name of the tenant
     meter_number: str  # Meter number
-    last_consumption: Optional[int] = 0  # Last recorded consumption
+    last_consumption: Optional[int] = None  # Last recorded consumption
+    last_reading_date: Optional[datetime] = None  # Date of the last reading (serialized by pydantic as an ISO-8601 string)
+    initial_reading: Optional[int] = None  # Initial meter reading
 
-    class Config:
-        from_attributes = True  # Enable ORM mode for SQLModel compatibility
+# Schema for updating a profile's initial reading
+class InitialReadingUpdate(BaseModel):
+    initial_reading: int  # Initial meter reading to update
 
 # Schema for creating a new reading
 class ReadingCreate(BaseModel):
-    date: datetime  # Date of the reading
+    profile_id: int  # Associated profile ID
+    date: datetime  # Date of the reading ("YYYY-MM-DD" or full ISO-8601)
     previous: int  # Previous meter reading
     current: int  # Current meter reading
 
-    @validator("previous", "current")
+    @field_validator("date")
+    @classmethod
+    def to_naive_utc(cls, v: datetime) -> datetime:
+        """Store timezone-aware dates as naive UTC to match the reading.date column."""
+        if v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+    @field_validator("previous", "current")
+    @classmethod
     def check_non_negative(cls, v: int) -> int:
         """Validate that the reading value is non-negative."""
         if v < 0:
             raise ValueError("Reading must be non-negative")
         return v
 
-    @validator("current")
-    def check_current_gte_previous(cls, v: int, values: dict) -> int:
+    @field_validator("current")
+    @classmethod
+    def check_current_gte_previous(cls, v: int, info: ValidationInfo) -> int:
         """Validate that the current reading is >= previous reading."""
-        if "previous" in values and v < values["previous"]:
+        if "previous" in info.data and v < info.data["previous"]:
             raise ValueError("Current reading must be >= previous reading")
         return v
 
 # Schema for reading response
 class ReadingResponse(BaseModel):
-    id: UUID  # Unique identifier for the reading
-    profile_id: UUID  # Associated profile ID
-    date: datetime  # Date of the reading
+    model_config = ConfigDict(from_attributes=True)  # Allow validation straight from ORM objects
+
+    id: int  # Reading ID
+    profile_id: int  # Associated profile ID
+    date: datetime  # Date of the reading (serialized by pydantic as an ISO-8601 string)
     previous: int  # Previous meter reading
     current: int  # Current meter reading
     consumption: int  # Calculated consumption
 
-    class Config:
-        from_attributes = True  # Enable ORM mode for SQLModel compatibility
\ No newline at end of file
+# Schema for one page of readings (keyset pagination, newest first)
+class ReadingPage(BaseModel):
+    items: List[ReadingResponse]  # Readings on this page, ordered by id descending
+    next_cursor: Optional[int] = None  # Pass as before_id to fetch the next page; None on the last page
@@ -10,6 +10,7 @@ import ProfileHeader from "./ProfileHeader";
 import AddReadingForm from "./AddReadingForm";
 import ReadingsTable from "./ReadingsTable";
 import { Alert, AlertDescription, AlertTitle } from "@/components/ui/alert";
+import { Button } from "@/components/ui/button";
 
 // Types for Profile and Reading data
 type Reading = {
@@ -21,6 +22,11 @@ type Reading = {
   consumption: number;
 };
 
+type ReadingPage = {
+  items: Reading[];
+  next_cursor: number | null;
+};
+
 type Profile = {
   id: number;
   user_id: string;
@@ -31,6 +37,28 @@ type Profile = {
   initial_reading: number | null;
 };
 
+// Fetch one page of readings (newest first); pass the previous page's next_cursor to continue
+const fetchReadingsPage = async (
+  profileId: string | string[] | undefined,
+  token: string,
+  cursor: number | null
+): Promise<ReadingPage> => {
+  const query = cursor === null ? "" : `&before_id=${cursor}`;
+  const response = await fetch(
+    `http://localhost:8000/api/readings?profile_id=${profileId}${query}`,
+    {
+      headers: { Authorization: `Bearer ${token}` },
+    }
+  );
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(
+      errorData.detail || `Failed to fetch readings: ${response.status}`
+    );
+  }
+  return response.json();
+};
+
 // Main Meter Details Component
 export default function MeterDetails() {
   const { isSignedIn, getToken, userId } = useAuth();
@@ -39,6 +67,8 @@ export default function MeterDetails() {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [readings, setReadings] = useState<Reading[]>([]);
+  const [nextCursor, setNextCursor] = useState<number | null>(null); // Cursor for "Load more"
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [profile, setProfile] = useState<Profile | null>(null);
   const [authChecked, setAuthChecked] = useState(false); // New state to track auth check
 
@@ -79,22 +109,10 @@ export default function MeterDetails() {
         const profileData = await profileResponse.json();
         setProfile(profileData);
 
-        // Fetch readings
-        const readingsResponse = await fetch(
-          `http://localhost:8000/api/readings?profile_id=${profileId}`,
-          {
-            headers: { Authorization: `Bearer ${token}` },
-          }
-        );
-        if (!readingsResponse.ok) {
-          const errorData = await readingsResponse.json();
-          throw new Error(
-            errorData.detail ||
-              `Failed to fetch readings: ${readingsResponse.status}`
-          );
-        }
-        const readingsData = await readingsResponse.json();
-        setReadings(readingsData);
+        // Fetch the newest page of readings; older pages load on demand
+        const page = await fetchReadingsPage(profileId, token, null);
+        setReadings(page.items);
+        setNextCursor(page.next_cursor);
 
         // Clear error state on successful fetch
         setError(null);
@@ -116,6 +134,28 @@ export default function MeterDetails() {
     setError(null); // Clear error on successful action
   };
 
+  // Handle loading the next (older) page of readings. Pages follow insertion order (id),
+  // while ReadingsTable sorts by date, so a backdated reading may appear mid-table here
+  const handleLoadMore = async () => {
+    if (nextCursor === null) return;
+    setIsLoadingMore(true);
+    try {
+      const token = await getToken({ template: "default" });
+      if (!token) throw new Error("Authentication token not found");
+
+      const page = await fetchReadingsPage(profileId, token, nextCursor);
+      setReadings((prevReadings) => [...prevReadings, ...page.items]);
+      setNextCursor(page.next_cursor);
+      setError(null); // Clear error on successful action
+    } catch (err) {
+      setError(
+        err instanceof Error ? err.message : "An unexpected error occurred"
+      );
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   // Handle deleting a reading
   const handleDeleteReading = async (readingId: number) => {
     if (!isSignedIn || !userId) {
@@ -299,6 +339,17 @@ export default function MeterDetails() {
                 readings={readings}
                 onDeleteReading={handleDeleteReading}
               />
+              {nextCursor !== null && (
+                <div className="flex justify-center mt-4">
+                  <Button
+                    variant="outline"
+                    onClick={handleLoadMore}
+                    disabled={isLoadingMore}
+                  >
+                    {isLoadingMore ? "Loading..." : "Load more readings"}
+                  </Button>
+                </div>
+              )}
             </div>
           )}
         </motion.div>